@@ -10,6 +10,17 @@ from utils.prompt_library import get_frontend_developer_prompt
 from core.constants import AGENT_FRONTEND_DEV
 from core.llm_client import ask_agent
 
+# Response-cleanup patterns, compiled once (every generated file goes through them)
+_INVALID_FILENAME_CHARS_RE = re.compile(r'[<>:"/\\|?*]')
+_FENCE_OPEN_LINE_RE = re.compile(r'^```(?:html|css|javascript|js|xml)?\s*', re.MULTILINE)
+_FENCE_CLOSE_LINE_RE = re.compile(r'\s*```$', re.MULTILINE)
+_FENCE_OPEN_RE = re.compile(r'^```\w*\s*')
+_FENCE_CLOSE_RE = re.compile(r'\s*```$')
+_THINKING_RE = re.compile(r'\[.*?\] 🧠 Thinking\.\.\..*?Done!', re.DOTALL)
+_JSON_OBJECT_RE = re.compile(r'\{.*\}', re.DOTALL)
+_FILE_HEADER_RE = re.compile(r'(?m)^(?:<!--|/\*|//)?\s*(HTML|CSS|JS|JAVASCRIPT)\s+FILE:\s*([^\n\r]+?)(?:\s*-->|\s*\*/)?\s*$', re.IGNORECASE)
+_FRONTEND_CODE_BLOCK_RE = re.compile(r'```(?:html|css|javascript|js)?\s*(.*?)\s*```', re.DOTALL)
+
 def sanitize_filename(filename: str) -> str:
     """
     Remove invalid Windows/Unix filename characters and path components.
@@ -19,8 +30,7 @@ def sanitize_filename(filename: str) -> str:
     filename = filename.replace('\\', '/').split('/')[-1]
     
     # Remove invalid characters
-    invalid_chars = r'[<>:"/\\|?*]'
-    sanitized = re.sub(invalid_chars, '', filename)
+    sanitized = _INVALID_FILENAME_CHARS_RE.sub('', filename)
     sanitized = sanitized.strip('.')
     return sanitized if sanitized else 'file.txt'
 
@@ -69,8 +79,8 @@ def run_frontend_developer(app_idea: str, api_spec: str, blackboard=None):
 def clean_file_content(content: str, file_type: str) -> str:
     """Clean up markdown and conversational artifacts from file content."""
     # Remove markdown code blocks
-    content = re.sub(r'^```(?:html|css|javascript|js|xml)?\s*', '', content, flags=re.MULTILINE)
-    content = re.sub(r'\s*```$', '', content, flags=re.MULTILINE)
+    content = _FENCE_OPEN_LINE_RE.sub('', content)
+    content = _FENCE_CLOSE_LINE_RE.sub('', content)
     
     # Remove trailing conversational text
     # Look for common ending patterns and cut everything after
@@ -107,11 +117,11 @@ def extract_frontend_files(response_text: str) -> dict:
     files = {}
     
     # 1. First, remove any "Thought" or "Thinking" blocks that might confuse parsing
-    response_text = re.sub(r'\[.*?\] 🧠 Thinking\.\.\..*?Done!', '', response_text, flags=re.DOTALL)
+    response_text = _THINKING_RE.sub('', response_text)
     
     # 2. Try JSON parsing first (if the model followed instructions perfectly)
     try:
-        json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
+        json_match = _JSON_OBJECT_RE.search(response_text)
         if json_match:
             data = json.loads(json_match.group(0))
             if "files" in data:
@@ -141,10 +151,8 @@ def extract_frontend_files(response_text: str) -> dict:
     # (?:-->|\*/)? = Optional comment end
     # \s*$ = End of line
     
-    # NOTE: We use re.IGNORECASE to catch "html file:" as well
-    pattern = r'(?m)^(?:<!--|/\*|//)?\s*(HTML|CSS|JS|JAVASCRIPT)\s+FILE:\s*([^\n\r]+?)(?:\s*-->|\s*\*/)?\s*$'
-    
-    parts = re.split(pattern, response_text, flags=re.IGNORECASE)
+    # NOTE: _FILE_HEADER_RE uses re.IGNORECASE to catch "html file:" as well
+    parts = _FILE_HEADER_RE.split(response_text)
     
     # parts[0] is preamble (garbage)
     # parts[1] is Type 1
@@ -173,8 +181,8 @@ def extract_frontend_files(response_text: str) -> dict:
             if 'js' in ftype and not safe_name.endswith('.js'): safe_name += '.js'
             
             # Additional clean: remove any leading ```html or trailing ``` if they slipped in
-            content = re.sub(r'^```\w*\s*', '', content)
-            content = re.sub(r'\s*```$', '', content)
+            content = _FENCE_OPEN_RE.sub('', content)
+            content = _FENCE_CLOSE_RE.sub('', content)
             
             files[safe_name] = content
 
@@ -187,7 +195,7 @@ def extract_frontend_files(response_text: str) -> dict:
              # But if it's just raw text, let's look for blocks
              pass
 
-        code_blocks = re.findall(r'```(?:html|css|javascript|js)?\s*(.*?)\s*```', response_text, re.DOTALL)
+        code_blocks = _FRONTEND_CODE_BLOCK_RE.findall(response_text)
         if code_blocks:
             # Try to identify file types from context
             for i, block in enumerate(code_blocks):
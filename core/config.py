@@ -1,3 +1,5 @@
 
 MODEL = 'llama3.1'
 MAX_RETRIES = 3
+LLM_MAX_CONCURRENCY = 8 # In-flight LLM requests across all worker threads
+MODEL_KEEP_ALIVE = '30m' # How long the server keeps the model loaded between requests
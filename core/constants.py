@@ -1,7 +1,14 @@
 
+import os
+
 # Environment & Model Configuration
 MODEL_NAME = 'llama3.1'
 MAX_RETRIES = 3
+L6_FIX_CANDIDATES = 2 # Parallel fix proposals per failed L6 debug attempt
+APP_STARTUP_TIMEOUT = 5 # Seconds an app must survive to count as a running server
+MAX_PARALLEL_MODULES = 16 # Modules in flight at once; workers mostly wait on LLM I/O
+AST_OFFLOAD_MIN_BYTES = 64 * 1024 # Smaller modules are analysed in-thread; a process hop costs more than the parse
+LOG_TEST_FAILURES = os.environ.get("AGENTFACTORY_LOG_FAILURES", "1") != "0" # Keep full pytest logs of failed runs
 
 # File & Directory Paths
 OUTPUT_DIR = "output"
@@ -1,15 +1,41 @@
-import json
 import os
 import time
 import re
+import sys
+import hashlib
+import mmap
+import atexit
+import threading
+import functools
+import contextlib
 
+from core.logger import now_str, ORJSON_AVAILABLE, json_dumps as _dumps, json_loads as _loads
+
+# blackboard.json/metrics.json are machine-read; AGENT_FACTORY_PRETTY=1 indents them for humans
+_PRETTY_JSON = os.environ.get("AGENT_FACTORY_PRETTY") == "1"
+
+_MMAP_MIN_BYTES = 1 << 20
+
+def _load_json_file(f):
+    """Parses an open binary JSON file; large files are handed to orjson straight from the page cache."""
+    size = os.fstat(f.fileno()).st_size
+    if ORJSON_AVAILABLE and size >= _MMAP_MIN_BYTES:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return _loads(memoryview(mm))
+    return _loads(f.read())
+
+# Explicit small classes: no Unicode property lookups per character
+_WS_RE = re.compile(r'[ \t\n\r\f\v\u00A0\u200B]+')
+_NONWORD_RE = re.compile(r'[^a-zA-Z0-9_\-]')
+
+@functools.lru_cache(maxsize=1024) # Same few names are normalized over and over
 def normalize_filename(name):
     """
     Standardizes filenames to prevent mismatch errors.
     Handles non-breaking spaces, unicode whitespace, and casing.
     """
     # 1. Replace non-breaking spaces and other unicode whitespace with standard space
-    clean_name = re.sub(r'[\s\u00A0\u200B]+', ' ', str(name))
+    clean_name = _WS_RE.sub(' ', str(name))
     # 2. Strip whitespace
     clean_name = clean_name.strip().lower()
     # 3. Replace spaces/dots (except extension) with underscores
@@ -20,10 +46,156 @@ def normalize_filename(name):
         base = clean_name
         ext = ''
         
-    base = re.sub(r'[^\w\-]', '_', base)
+    base = _NONWORD_RE.sub('_', base)
     return f"{base}{ext}"
 
-class FactoryMetrics:
+class _JsonlLog:
+    """Append-only JSONL sidecar with one long-lived handle (O(1) per entry, no full rewrites)."""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.fp = None
+
+    def append(self, entry):
+        line = _dumps(entry) + b"\n"
+        with self.lock:
+            if self.fp is None:
+                self.fp = open(self.path, "ab", buffering=1 << 16)
+            self.fp.write(line)
+
+    def flush(self):
+        with self.lock:
+            if self.fp:
+                self.fp.flush()
+
+    def __iter__(self):
+        """Streams the entries written so far."""
+        self.flush()
+        try:
+            with open(self.path, "rb") as f:
+                for line in f:
+                    if line.strip():
+                        yield _loads(line)
+        except FileNotFoundError:
+            return
+
+class _DebouncedSave:
+    """
+    JSON persistence of self.state to self.path.
+    save() writes now; log-style updates go through _mark_dirty(), which writes at most
+    every SAVE_INTERVAL seconds. flush() (also run at exit) writes whatever is pending.
+    """
+    SAVE_INTERVAL = 0.25
+    _dirty = False
+    _last_save = 0.0
+    _batch_depth = 0
+
+    def save(self):
+        if self._batch_depth:
+            self._dirty = True
+            return
+        # Encode in one go (json.dump issues a write per token), then swap the file in atomically;
+        # the temp name is per thread because worker threads may save concurrently, and a plain
+        # open() keeps the umask permissions (mkstemp would leave the result owner-only)
+        data = self._encode_state()
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self._dirty = False
+        self._last_save = time.monotonic()
+
+    def _encode_state(self):
+        return _dumps(self.state, _PRETTY_JSON)
+
+    def _mark_dirty(self):
+        self._dirty = True
+        if not self._batch_depth and time.monotonic() - self._last_save > self.SAVE_INTERVAL:
+            self.save()
+
+    def flush(self):
+        if self._dirty:
+            self.save()
+
+    @contextlib.contextmanager
+    def batched(self):
+        """Suppresses writes inside the block and saves once on exit."""
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth:
+                self.flush()
+
+# Shorter prompts are logged inline every time; longer ones once per process, then by reference
+_PROMPT_POOL_MIN_CHARS = 256
+
+# Fields every blueprint module must define (checked without allocating on the valid path)
+_REQUIRED_MODULE_KEYS = frozenset({"name", "filename", "type", "responsibility", "requires"})
+
+# Initial blackboard state; idea/created_at are filled in per instance
+_DEFAULT_STATE_TEMPLATE = {
+    "project_info": {
+        "idea": None,
+        "created_at": None,
+        "status": "PLANNING"
+    },
+    # STRICT ARCHITECTURE SECTION
+    "architecture": {
+        "app_type": None,
+        "entrypoint": {
+            "entry_file": None,
+            "entry_callable": None
+        },
+        "main_flow": [],
+        "assembly": {
+            "initialization_order": [],
+            "dependency_graph": {}
+        },
+        "runtime": {
+            "language": None,
+            "version": None,
+            "command": None,
+            "env_vars": [],
+            "port": None
+        },
+        "modules": [], # List of module definitions
+        "metadata": {
+            "version": "0.0.0",
+            "last_updated_by": None,
+            "change_log": []
+        }
+    },
+    # MODULE REGISTRY (Detailed Implementation State)
+    "modules": {}, 
+    "api_registry": {},
+    
+    # ARTIFACT TRACKING
+    "required_files": [], # Derived from architecture
+    "files_created": [],
+    
+    # GLOBAL CONSTRAINTS
+    "constraints": {
+        "no_invention": True,
+        "blackboard_only": True,
+        "fail_on_missing": True
+    },
+    
+    # LOGS
+    "logs": [],
+    "agent_reasoning": []
+}
+# Decoding the pre-encoded template is a cheaper deep copy than copy.deepcopy
+_DEFAULT_STATE_BYTES = _dumps(_DEFAULT_STATE_TEMPLATE)
+
+class FactoryMetrics(_DebouncedSave):
     """
     Separate metrics storage for code quality data.
     Keeps historical metrics data out of the main blackboard.
@@ -33,39 +205,38 @@ class FactoryMetrics:
         self.root_dir = root_dir
         self.metadata_dir = metadata_dir or root_dir
         self.path = os.path.join(self.metadata_dir, "metrics.json")
+        # Attempts carry full prompts/responses; they go to an append-only sidecar, not metrics.json
+        self.attempts_log = _JsonlLog(os.path.join(self.metadata_dir, "agent_attempts.jsonl"))
+        # Retries resend the same prompt: its text is logged once, later attempts carry "input_ref"
+        self._logged_inputs = set()
         self.state = {
             "modules": {},
             "agent_attempts": []
         }
         self.load()
+        atexit.register(self.flush)
     
     def load(self):
-        if os.path.exists(self.path):
-            try:
-                with open(self.path, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    # Handle legacy format where root was dict of modules
-                    if "modules" not in data and "agent_attempts" not in data:
-                         self.state = {
-                             "modules": data,
-                             "agent_attempts": []
-                         }
-                    else:
-                        self.state = data
-            except:
-                self.state = {
-                    "modules": {},
-                    "agent_attempts": []
-                }
-        else:
+        # Open directly: a missing file is the common case and costs one failed open, not stat + open
+        try:
+            with open(self.path, "rb") as f:
+                data = _load_json_file(f)
+        except (OSError, ValueError): # Missing or unreadable/corrupt file
+            data = None
+
+        if data is None:
             self.state = {
                 "modules": {},
                 "agent_attempts": []
             }
-    
-    def save(self):
-        with open(self.path, "w", encoding="utf-8") as f:
-            json.dump(self.state, f, indent=2)
+        # Handle legacy format where root was dict of modules
+        elif "modules" not in data and "agent_attempts" not in data:
+            self.state = {
+                "modules": data,
+                "agent_attempts": []
+            }
+        else:
+            self.state = data
     
     def log_quality_metrics(self, module: str, reviewer_score: int, issues: int, 
                           optimizations: int, review_report: dict = None):
@@ -74,7 +245,7 @@ class FactoryMetrics:
             "reviewer_score": reviewer_score,
             "issues_found": issues,
             "optimizations_applied": optimizations,
-            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S")
+            "timestamp": now_str()
         }
         
         if review_report:
@@ -84,22 +255,34 @@ class FactoryMetrics:
             metrics["recommendations"] = review_report.get("recommendations", [])
         
         self.state["modules"][module] = metrics
-        self.save()
+        self._mark_dirty()
 
     def log_agent_attempt(self, agent: str, module: str, attempt_num: int, 
                          input_data: str, output: str, status: str, error: str = None):
         entry = {
-            "agent": agent,
-            "module": module,
+            "agent": sys.intern(agent),
+            "module": sys.intern(module),
             "attempt_number": attempt_num,
-            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
-            "input": input_data,
+            "timestamp": now_str(),
             "output": output,
-            "status": status,
+            "status": sys.intern(status),
             "error": error
         }
-        self.state["agent_attempts"].append(entry)
-        self.save()
+        if isinstance(input_data, str) and len(input_data) >= _PROMPT_POOL_MIN_CHARS:
+            input_id = hashlib.blake2b(input_data.encode("utf-8"), digest_size=8).hexdigest()
+            if input_id in self._logged_inputs:
+                entry["input_ref"] = input_id
+            else:
+                self._logged_inputs.add(input_id)
+                entry["input"] = input_data
+                entry["input_id"] = input_id
+        else:
+            entry["input"] = input_data
+        self.attempts_log.append(entry)
+    
+    def flush(self):
+        self.attempts_log.flush()
+        super().flush()
     
     def get_metrics(self, module: str = None):
         """Retrieve metrics for a specific module or all modules."""
@@ -121,10 +304,21 @@ class FactoryMetrics:
             "total_optimizations": sum(m.get("optimizations_applied", 0) for m in modules.values())
         }
     
+    def iter_agent_attempts(self):
+        """Attempts from a legacy metrics.json (if any) followed by the sidecar log (input_ref resolved)."""
+        yield from self.state.get("agent_attempts", [])
+        inputs = {}
+        for entry in self.attempts_log:
+            if "input_id" in entry:
+                inputs[entry.pop("input_id")] = entry["input"]
+            elif "input_ref" in entry:
+                entry["input"] = inputs.get(entry.pop("input_ref"))
+            yield entry
+
     def get_agent_attempts(self):
-        return self.state.get("agent_attempts", [])
+        return list(self.iter_agent_attempts())
 
-class FactoryBlackboard:
+class FactoryBlackboard(_DebouncedSave):
     """
     SINGLE SOURCE OF TRUTH
     Used by factory_boss.py
@@ -136,76 +330,92 @@ class FactoryBlackboard:
     - Prevents partial or invalid states
     - Distinguishes between required and created artifacts
     """
+    LOG_TAIL = 50 # Log lines kept inline in blackboard.json (full history: logs.jsonl)
+    STABLE_KEYS = frozenset({"architecture", "constraints"}) # Only replaced by set_architecture
 
     def __init__(self, idea, root_dir, metadata_dir=None):
         self.root_dir = root_dir
         self.metadata_dir = metadata_dir or root_dir
         self.path = os.path.join(self.metadata_dir, "blackboard.json")
-        self.metrics = FactoryMetrics(root_dir, self.metadata_dir)
+        self.logs_log = _JsonlLog(os.path.join(self.metadata_dir, "logs.jsonl"))
+        # metrics.json is only opened and parsed once something actually touches self.metrics
+        self._metrics = None
+        self._metrics_lock = threading.Lock()
 
-        # Initialize State with strict structure
-        self.state = {
-            "project_info": {
-                "idea": idea,
-                "created_at": time.strftime("%Y-%m-%d %H:%M:%S"),
-                "status": "PLANNING"
-            },
-            # STRICT ARCHITECTURE SECTION
-            "architecture": {
-                "app_type": None,
-                "entrypoint": {
-                    "entry_file": None,
-                    "entry_callable": None
-                },
-                "main_flow": [],
-                "assembly": {
-                    "initialization_order": [],
-                    "dependency_graph": {}
-                },
-                "runtime": {
-                    "language": None,
-                    "version": None,
-                    "command": None,
-                    "env_vars": [],
-                    "port": None
-                },
-                "modules": [], # List of module definitions
-                "metadata": {
-                    "version": "0.0.0",
-                    "last_updated_by": None,
-                    "change_log": []
-                }
-            },
-            # MODULE REGISTRY (Detailed Implementation State)
-            "modules": {}, 
-            "api_registry": {},
-            
-            # ARTIFACT TRACKING
-            "required_files": [], # Derived from architecture
-            "files_created": [],
-            
-            # GLOBAL CONSTRAINTS
-            "constraints": {
-                "no_invention": True,
-                "blackboard_only": True,
-                "fail_on_missing": True
-            },
-            
-            # LOGS
-            "logs": [],
-            "agent_reasoning": []
-        }
+        # Initialize State with strict structure (fresh copy of the template)
+        self.state = _loads(_DEFAULT_STATE_BYTES)
+        self.state["project_info"]["idea"] = idea
+        self.state["project_info"]["created_at"] = now_str()
+
+        # Bumped on every mutation; lets snapshot() reuse its last serialization
+        self._state_version = 0
+        self._snapshot_cache = None # (state_version, json string)
+        self._files_listing_cache = None # (state_version, newline-joined files_created)
+
+        # Set mirrors of required_files / files_created (the JSON keeps lists) for O(1) membership
+        self._required_set = set()
+        self._created_set = set()
+        self._missing = set() # required - created, kept up to date by set_architecture/register_module
+
+        # Encoded JSON of the STABLE_KEYS sub-trees, spliced into every save
+        self._enc_cache = {}
 
         self.save()
+        atexit.register(self.flush)
 
     # ---------- CORE ----------
+    @property
+    def metrics(self):
+        if self._metrics is None:
+            with self._metrics_lock: # Worker threads may log attempts concurrently; load only once
+                if self._metrics is None:
+                    self._metrics = FactoryMetrics(self.root_dir, self.metadata_dir)
+        return self._metrics
+
     def save(self):
-        with open(self.path, "w", encoding="utf-8") as f:
-            json.dump(self.state, f, indent=2)
+        # Every mutator persists through save() or _mark_dirty(), so this is where the state version moves
+        self._state_version += 1
+        super().save()
+
+    def _mark_dirty(self):
+        self._state_version += 1
+        super()._mark_dirty()
+
+    def _encode_state(self):
+        # Compact saves re-encode only the sub-trees that can have changed (pretty output is left to the encoder)
+        if _PRETTY_JSON:
+            return super()._encode_state()
+        parts = []
+        for key, value in self.state.items():
+            enc = self._enc_cache.get(key)
+            if enc is None:
+                enc = _dumps(value)
+                if key in self.STABLE_KEYS:
+                    self._enc_cache[key] = enc
+            parts.append(_dumps(key) + b":" + enc)
+        return b"{" + b",".join(parts) + b"}"
 
     def log(self, msg):
-        self.state["logs"].append(msg)
-        self.save()
+        # Full history goes to logs.jsonl; blackboard.json keeps only the recent tail
+        self.logs_log.append({"t": now_str(), "msg": msg})
+        logs = self.state["logs"]
+        logs.append(msg)
+        if len(logs) > self.LOG_TAIL:
+            del logs[:-self.LOG_TAIL]
+        # Debounced like other log-style updates; the base version skips the state_version bump
+        # because logs aren't part of snapshot()
+        super()._mark_dirty()
+
+    def flush(self):
+        self.logs_log.flush()
+        super().flush()
+
+    @contextlib.contextmanager
+    def batched(self):
+        """Like _DebouncedSave.batched, but also holds back metrics.json writes (if metrics are loaded)."""
+        metrics = self._metrics.batched() if self._metrics is not None else contextlib.nullcontext()
+        with super().batched(), metrics:
+            yield self
 
     # ---------- ARCHITECTURE & VALIDATION ----------
     def set_architecture(self, blueprint: dict):
@@ -224,6 +434,7 @@ class FactoryBlackboard:
         
         # Populate Required Files derived from modules
         self.state["required_files"] = [m["filename"] for m in blueprint["modules"]]
+        self._required_set = set(self.state["required_files"])
         
         # Add entrypoint file to required files if not already there
         entry_file = blueprint.get("entrypoint", "main.py")
@@ -238,10 +449,13 @@ class FactoryBlackboard:
                 "entry_callable": "app" if "flask" in str(blueprint.get("app_type", "")).lower() else "main"
             }
             
-        if entry_file_name not in self.state["required_files"]:
+        if entry_file_name not in self._required_set:
+            self._required_set.add(entry_file_name)
             self.state["required_files"].append(entry_file_name)
+        self._missing = self._required_set - self._created_set
             
         self.state["project_info"]["status"] = "ARCHITECTED"
+        self._enc_cache.pop("architecture", None)
         self.save()
 
     def _validate_blueprint_structure(self, bp):
@@ -261,8 +475,8 @@ class FactoryBlackboard:
              raise ValueError("MISSING: 'modules' list is required and cannot be empty.")
         
         for m in bp["modules"]:
-            missing = [k for k in ["name", "filename", "type", "responsibility", "requires"] if k not in m]
-            if missing:
+            if not _REQUIRED_MODULE_KEYS.issubset(m):
+                missing = sorted(_REQUIRED_MODULE_KEYS - m.keys())
                 raise ValueError(f"INVALID MODULE: {m.get('name', 'Unknown')} missing fields: {missing}")
 
         # 3. Main Flow
@@ -314,7 +528,9 @@ class FactoryBlackboard:
             "explicit_dependencies": explicit_dependencies or []
         }
         
-        if filename not in self.state["files_created"]:
+        if filename not in self._created_set:
+            self._created_set.add(filename)
+            self._missing.discard(filename)
             self.state["files_created"].append(filename)
         self.save()
 
@@ -324,6 +540,11 @@ class FactoryBlackboard:
         self.state["modules"][name]["spec"] = spec
         self.save()
 
+    def register_frontend_files(self, filenames):
+        """Records generated templates/static files."""
+        self.state.setdefault("frontend_files", []).extend(filenames)
+        self._mark_dirty()
+
     def register_api(self, module_name, api_spec):
         if "api_registry" not in self.state:
             self.state["api_registry"] = {}
@@ -333,14 +554,14 @@ class FactoryBlackboard:
     # ---------- AGENT REASONING & DEBUGGING ----------
     def log_agent_reasoning(self, agent: str, module: str, reasoning: str, decision: str):
         entry = {
-            "agent": agent,
-            "module": module,
-            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "agent": sys.intern(agent),
+            "module": sys.intern(module),
+            "timestamp": now_str(),
             "reasoning": reasoning,
             "decision": decision
         }
         self.state["agent_reasoning"].append(entry)
-        self.save()
+        self._mark_dirty()
 
     def log_agent_attempt(self, agent: str, module: str, attempt_num: int, 
                          input_data: str, output: str, status: str, error: str = None):
@@ -350,47 +571,47 @@ class FactoryBlackboard:
         self.metrics.log_agent_attempt(agent, module, attempt_num, input_data, output, status, error)
 
     def generate_debug_report(self, output_path):
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write("# Factory Debug Report\n\n")
-            f.write(f"**Date:** {time.strftime('%Y-%m-%d %H:%M:%S')}\n")
-            f.write(f"**Idea:** {self.state['project_info']['idea']}\n\n")
-            
-            f.write("## 1. Architecture Status\n")
-            f.write(f"- **Status:** {self.state['project_info']['status']}\n")
-            f.write(f"- **App Type:** {self.state['architecture'].get('app_type', 'N/A')}\n")
-            f.write(f"- **Runtime:** {self.state['architecture'].get('runtime', {}).get('language', 'N/A')}\n")
-            
-            f.write("\n## 2. Module Verification\n")
-            req_files = set(self.state.get("required_files", []))
-            created_files = set(self.state.get("files_created", []))
-            missing = req_files - created_files
-            
-            f.write(f"- **Required Files:** {len(req_files)}\n")
-            f.write(f"- **Created Files:** {len(created_files)}\n")
-            if missing:
-                f.write(f"- **MISSING FILES:** {', '.join(missing)}\n")
-            else:
-                f.write("- **ALL FILES PRESENT**\n")
+        # Assembled in memory and written once
+        parts = [
+            "# Factory Debug Report\n\n",
+            f"**Date:** {now_str()}\n",
+            f"**Idea:** {self.state['project_info']['idea']}\n\n",
+            "## 1. Architecture Status\n",
+            f"- **Status:** {self.state['project_info']['status']}\n",
+            f"- **App Type:** {self.state['architecture'].get('app_type', 'N/A')}\n",
+            f"- **Runtime:** {self.state['architecture'].get('runtime', {}).get('language', 'N/A')}\n",
+            "\n## 2. Module Verification\n"
+        ]
+        missing = self._missing
+        
+        parts.append(f"- **Required Files:** {len(self._required_set)}\n")
+        parts.append(f"- **Created Files:** {len(self._created_set)}\n")
+        if missing:
+            parts.append(f"- **MISSING FILES:** {', '.join(missing)}\n")
+        else:
+            parts.append("- **ALL FILES PRESENT**\n")
+
+        parts.append("\n## 3. Execution Log\n")
+        # Attempts are streamed from the sidecar log rather than materialised as a list
+        for i, attempt in enumerate(self.metrics.iter_agent_attempts(), 1):
+            parts.append(f"\n### Step {i}: {attempt['agent']} -> {attempt.get('module', 'N/A')}\n")
+            parts.append(f"- **Status:** {attempt['status']}\n")
+            if attempt.get('error'):
+                parts.append(f"- **Error:** {attempt['error']}\n")
 
-            f.write("\n## 3. Execution Log\n")
-            attempts = self.metrics.get_agent_attempts()
-            for i, attempt in enumerate(attempts, 1):
-                f.write(f"\n### Step {i}: {attempt['agent']} -> {attempt.get('module', 'N/A')}\n")
-                f.write(f"- **Status:** {attempt['status']}\n")
-                if attempt.get('error'):
-                    f.write(f"- **Error:** {attempt['error']}\n")
+        with open(output_path, 'w', encoding='utf-8') as f:
+            f.write("".join(parts))
 
     def log_quality_metrics(self, module: str, reviewer_score: int, issues: int, optimizations: int, review_report: dict = None):
         self.metrics.log_quality_metrics(module, reviewer_score, issues, optimizations, review_report)
 
     # ---------- AGENT CONTEXT ----------
-    def snapshot(self):
+    def snapshot_dict(self):
         """
-        Provides the FULL Blackboard state to agents.
-        Includes ALL runtime-critical sections.
+        The agent-relevant sections of the state as a dict (live references, no serialization).
+        Use this when the consumer wants data rather than prompt text.
         """
-        # Ensure we return the full state relevant to agents
-        return json.dumps({
+        return {
             "project_info": self.state["project_info"],
             "architecture": self.state["architecture"],
             "modules": self.state["modules"],
@@ -398,7 +619,27 @@ class FactoryBlackboard:
             "files_created": self.state["files_created"],
             "api_registry": self.state.get("api_registry", {}),
             "constraints": self.state["constraints"]
-        }, indent=2)
+        }
+
+    def snapshot(self):
+        """
+        Provides the FULL Blackboard state to agents as prompt text.
+        Includes ALL runtime-critical sections.
+        """
+        if self._snapshot_cache and self._snapshot_cache[0] == self._state_version:
+            return self._snapshot_cache[1]
+
+        snapshot = _dumps(self.snapshot_dict(), pretty=True).decode("utf-8")
+        self._snapshot_cache = (self._state_version, snapshot)
+        return snapshot
+
+    def files_listing(self):
+        """files_created as one newline-separated string, rebuilt only after a mutation."""
+        if self._files_listing_cache and self._files_listing_cache[0] == self._state_version:
+            return self._files_listing_cache[1]
+        listing = "\n".join(self.state["files_created"])
+        self._files_listing_cache = (self._state_version, listing)
+        return listing
 
     def verify_integrity(self, check_entrypoint=True):
         """
@@ -409,15 +650,13 @@ class FactoryBlackboard:
             check_entrypoint (bool): Whether to enforce presence of entrypoint file.
                                      Should be False before Integration Phase.
         """
-        req_files = set(self.state.get("required_files", []))
-        created_files = set(self.state.get("files_created", []))
-        missing = req_files - created_files
+        missing = self._missing
         
         if not check_entrypoint:
             # Safely get entrypoint filename
             entrypoint = self.state["architecture"].get("entrypoint", {}).get("entry_file")
             if entrypoint and entrypoint in missing:
-                missing.remove(entrypoint)
+                missing = missing - {entrypoint}
 
         if missing:
             raise RuntimeError(f"INTEGRATION FAILED: Missing required files: {missing}")
@@ -2,45 +2,115 @@ import ollama
 import re
 import yaml
 import json
-from core.config import MODEL
+import hashlib
+import threading
+from collections import OrderedDict
+# libyaml C bindings when available (several times faster than the pure-Python parser/emitter)
+try:
+    from yaml import CSafeLoader as YamlLoader, CSafeDumper as YamlDumper
+except ImportError:
+    from yaml import SafeLoader as YamlLoader, SafeDumper as YamlDumper
+from core.config import MODEL, LLM_MAX_CONCURRENCY, MODEL_KEEP_ALIVE
 from core.logger import log_orchestration_event, log_debug_interaction
 
+# One client for the whole process: its HTTP connection pool is reused across requests
+# (host from OLLAMA_HOST, as with the module-level ollama.chat)
+_client = ollama.Client()
+
+# Throttles concurrent requests to the model server; module workers can outnumber it
+_llm_slots = threading.BoundedSemaphore(LLM_MAX_CONCURRENCY)
+
+# ---------- RESPONSE CACHE ----------
+# Identical (model, role, system, message) prompts reuse the earlier raw response.
+# In-memory LRU for the current process: every run writes a fresh project dir, so
+# a per-project disk cache would never be read back.
+_CACHE_MAX_ENTRIES = 256
+_response_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+def _cache_key(role, system, message):
+    h = hashlib.blake2b(digest_size=20)
+    for part in (MODEL, role, system, message):
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+def _cache_get(key):
+    with _cache_lock:
+        response = _response_cache.get(key)
+        if response is not None:
+            _response_cache.move_to_end(key)
+        return response
+
+def _cache_put(key, response):
+    with _cache_lock:
+        _response_cache[key] = response
+        _response_cache.move_to_end(key)
+        while len(_response_cache) > _CACHE_MAX_ENTRIES:
+            _response_cache.popitem(last=False)
+
+# Values that open a block/flow collection, and plain scalars that never need quoting
+_YAML_BLOCK_STARTS = frozenset({'|', '>', '|-', '>-', '{', '['})
+_YAML_BLOCK_STARTS_SUFFIXES = tuple(_YAML_BLOCK_STARTS)
+_YAML_PLAIN_SCALARS = frozenset({'true', 'false', 'yes', 'no', 'null'})
+
+# Last document parsed by super_clean's validation, per thread: (text, parsed)
+_yaml_memo = threading.local()
+
+def _yaml_parses(text):
+    """Validation parse for super_clean; the result is kept so load_yaml can hand it over."""
+    try:
+        doc = yaml.load(text, Loader=YamlLoader)
+    except Exception:
+        return False
+    _yaml_memo.last = (text, doc)
+    return True
+
+def load_yaml(text):
+    """
+    yaml.load with YamlLoader. If super_clean just validated this exact text on this thread,
+    its parse is returned instead of parsing again (handed over once, so callers may mutate it).
+    """
+    last = getattr(_yaml_memo, "last", None)
+    _yaml_memo.last = None
+    if last is not None and last[0] == text:
+        return last[1]
+    return yaml.load(text, Loader=YamlLoader)
+
 def fix_yaml_content(text):
     """
     Fixes common YAML syntax errors in agent output.
     """
-    lines = text.split('\n')
     fixed_lines = []
+    prev_stripped = "" # Previous line, stripped once and carried over
     
-    for i, line in enumerate(lines):
-        original_line = line
-        if not line.strip() or line.strip().startswith('#'):
+    for line in text.split('\n'):
+        lstripped = line.lstrip()
+        indent = len(line) - len(lstripped)
+        stripped = lstripped.rstrip()
+        prev, prev_stripped = prev_stripped, stripped
+        
+        if not stripped or stripped[0] == '#':
             fixed_lines.append(line)
             continue
         
-        indent = len(line) - len(line.lstrip())
-        stripped = line.strip()
-        
-        if stripped.startswith('-'):
+        if stripped[0] == '-':
             fixed_lines.append(line)
             continue
         
         if ':' not in stripped:
-            if i > 0 and indent > 0:
-                prev_stripped = lines[i-1].strip()
-                if prev_stripped.endswith(('|', '>', '|-', '>-', '[', '{')):
-                    fixed_lines.append(line)
-                    continue
+            if indent > 0 and prev.endswith(_YAML_BLOCK_STARTS_SUFFIXES):
+                fixed_lines.append(line)
             continue
         
         colon_idx = stripped.find(':')
         key = stripped[:colon_idx].strip()
         val = stripped[colon_idx+1:].strip()
         
-        if not re.match(r'^[\w\s-]+$', key):
+        if not _YAML_KEY_RE.match(key):
             continue
         
-        if not val or val in ['|', '>', '|-', '>-', '{', '[']:
+        if not val or val in _YAML_BLOCK_STARTS:
             fixed_lines.append(line)
             continue
         
@@ -49,7 +119,7 @@ def fix_yaml_content(text):
             fixed_lines.append(line)
             continue
         
-        if val.lower() in ['true', 'false', 'yes', 'no', 'null'] or val.replace('.', '', 1).isdigit():
+        if val.lower() in _YAML_PLAIN_SCALARS or val.replace('.', '', 1).isdigit():
             fixed_lines.append(line)
             continue
         
@@ -67,21 +137,60 @@ def fix_yaml_content(text):
             new_line = f'{indent_str}{key}: "{val_escaped}"'
             fixed_lines.append(new_line)
         else:
-            fixed_lines.append(original_line)
+            fixed_lines.append(line)
     
     return '\n'.join(fixed_lines)
 
+# Compiled once; super_clean runs on every agent response
+_REASONING_RE = re.compile(r'REASONING:.*?END REASONING', re.DOTALL | re.IGNORECASE)
+_CODE_BLOCK_RE = re.compile(r'```(\w*)\s*(.*?)\s*```', re.DOTALL | re.IGNORECASE)
+_SQL_COMMENT_RE = re.compile(r'^--.*$', re.MULTILINE)
+_SQL_STATEMENT_RE = re.compile(r'^(CREATE|ALTER|DROP|SELECT|INSERT|UPDATE|DELETE|PRAGMA)\s+.*?(?:;|$)', re.MULTILINE | re.IGNORECASE | re.DOTALL)
+_YAML_DOC_SEP_RE = re.compile(r'^---\s*$', re.MULTILINE)
+_YAML_ROOT_KEY_RE = re.compile(r'^(modules|glossary|api_spec|blueprint|blackboard):', re.MULTILINE)
+_YAML_KEY_RE = re.compile(r'^[\w\s-]+$')
+# Bracket-free, length-capped spans keep this linear even on pathological output (it only runs after a parse failure)
+_FLOW_LIST_MAP_RE = re.compile(r'\[([^\[\]\n:]{0,200}:[^\[\]\n]{0,200})\]')
+FLOW_MAP_FIX_MAX_CHARS = 500_000
+# Conversational filler lines dropped from code output (one anchored, case-insensitive alternation)
+_JUNK_LINE_RE = re.compile(
+    r"\s*(?:here is|sure|note:|this script|i have|however|please|the following|i've added|corrected version"
+    r"|na podstawie|w oparciu|poniżej)",
+    re.IGNORECASE
+)
+_BLUEPRINT_HEADER_RE = re.compile(r'(?:Corrected blueprint|corrected version|CORRECTED BLUEPRINT|FIXED BLUEPRINT|IMPROVED BLUEPRINT)[:\s]+', re.IGNORECASE)
+
 def clean_reasoning(text):
     """Removes REASONING blocks from the text to allow clean parsing."""
-    clean = re.sub(r'REASONING:.*?END REASONING', '', text, flags=re.DOTALL | re.IGNORECASE)
-    return clean
+    upper = text.upper()
+    if len(upper) != len(text):
+        # Case mapping changed the length (e.g. "ß" -> "SS"), so indices wouldn't line up
+        return _REASONING_RE.sub('', text)
+    # Linear scan for "REASONING: ... END REASONING" blocks (same result as _REASONING_RE.sub)
+    start = upper.find("REASONING:")
+    if start < 0:
+        return text
+    parts = []
+    pos = 0
+    while start >= 0:
+        end = upper.find("END REASONING", start + 10)
+        if end < 0:
+            break
+        parts.append(text[pos:start])
+        pos = end + 13
+        start = upper.find("REASONING:", pos)
+    parts.append(text[pos:])
+    return "".join(parts)
 
 def super_clean(text, format_type="python"):
     # First, remove explicit reasoning blocks if present
-    text = clean_reasoning(text)
+    # (substring probes skip the regex on the common block-free response; prompts ask for "REASONING:")
+    if "REASONING" in text or "easoning" in text:
+        text = clean_reasoning(text)
     
-    # Capture language tag to allow filtering
-    blocks = re.findall(r'```(\w*)\s*(.*?)\s*```', text, re.DOTALL | re.IGNORECASE)
+    # Capture language tag to allow filtering (no fence, no blocks)
+    has_fence = '```' in text
+    blocks = _CODE_BLOCK_RE.findall(text) if has_fence else []
     if blocks:
         filtered_blocks = []
         for lang, content in blocks:
@@ -107,50 +216,50 @@ def super_clean(text, format_type="python"):
             # We found blocks but filtered them all out (e.g. found html but wanted python)
             # Return empty string to force validation failure rather than returning garbage
             return ""
-    else:
+    elif has_fence:
         text = text.replace(f'```{format_type}', '').replace('```', '')
 
     if format_type == "yaml":
-        text = re.sub(r'^--.*$', '', text, flags=re.MULTILINE)
-        text = re.sub(r'^(CREATE|ALTER|DROP|SELECT|INSERT|UPDATE|DELETE|PRAGMA)\s+.*?(?:;|$)', '', text, flags=re.MULTILINE | re.IGNORECASE | re.DOTALL)
-        text = re.sub(r'^---\s*$', '', text, flags=re.MULTILINE).strip()
+        text = _SQL_COMMENT_RE.sub('', text)
+        text = _SQL_STATEMENT_RE.sub('', text)
+        text = _YAML_DOC_SEP_RE.sub('', text).strip()
         
-        match = re.search(r'^(modules|glossary|api_spec|blueprint|blackboard):', text, re.MULTILINE)
+        match = _YAML_ROOT_KEY_RE.search(text)
         if match:
             text = text[match.start():]
         
         text = text.strip()
         
         # Aggressive YAML Cleanup logic
-        lines = text.split('\n')
-        min_indent = float('inf')
+        # Strip/indent each line once; both passes below reuse the (line, stripped, indent) tuples
+        entries = []
+        for line in text.split('\n'):
+            lstripped = line.lstrip()
+            entries.append((line, lstripped.rstrip(), len(line) - len(lstripped)))
         
         # 1. Detect minimum indentation of meaningful lines
-        for line in lines:
-            stripped = line.strip()
-            if stripped and not stripped.startswith('#'):
-                indent = len(line) - len(line.lstrip())
-                # Only count indentation of keys or list items, not continuation lines
-                if ':' in stripped or stripped.startswith('-'):
-                    min_indent = min(min_indent, indent)
-        
-        if min_indent == float('inf'):
+        # Only count indentation of keys or list items, not continuation lines
+        # (text is stripped, so a key/list item on the first line already fixes it at 0)
+        first = entries[0][1]
+        if first[:1] not in ("", "#") and (':' in first or first[0] == '-'):
             min_indent = 0
+        else:
+            min_indent = min(
+                (indent for _, stripped, indent in entries
+                 if stripped and stripped[0] != '#' and (':' in stripped or stripped[0] == '-')),
+                default=0
+            )
         
         cleaned_lines = []
-        for i, line in enumerate(lines):
-            stripped = line.strip()
-            
+        for line, stripped, indent in entries:
             # Preserve empty lines and comments
-            if not stripped or stripped.startswith('#'):
+            if not stripped or stripped[0] == '#':
                 cleaned_lines.append(line)
                 continue
             
             # Remove lines that are just "```" or markers
             if stripped.startswith('```') or stripped == '---':
                 continue
-
-            indent = len(line) - len(line.lstrip())
             
             # Filter out conversational text that accidentally got included (usually low indentation)
             # But preserve root keys (which have 0 indentation relative to min_indent)
@@ -159,20 +268,8 @@ def super_clean(text, format_type="python"):
                  if not stripped.endswith(':'):
                      continue 
             
-            # Fix common agent mistakes:
-            # 1. "- key: value" inside a map instead of "key: value"
-            # 2. "key: value" inside a list instead of "- key: value" (harder to fix safely)
-            
-            # Fix: invalid flow sequence char (like "key: [ ... :" )
-            # If line has a list start '[' but then has a colon inside it that isn't quoted
-            if '[' in stripped and ':' in stripped:
-                 # Check if colon is after the bracket
-                 bracket_idx = stripped.find('[')
-                 colon_idx = stripped.find(':', bracket_idx)
-                 if colon_idx > -1:
-                     # This is likely "key: [ item: value ]" which is invalid in some YAML parsers if not quoted
-                     # We'll just leave it for now, the fix_yaml_content might handle quotes
-                     pass
+            # Flow sequences with unquoted colons ("key: [ item: value ]") are left to
+            # fix_yaml_content and the flow-map fallback below
 
             cleaned_lines.append(line)
         
@@ -182,10 +279,9 @@ def super_clean(text, format_type="python"):
         fixed_text = fix_yaml_content(text)
         
         # Validate if it parses, if not, try to wrap it
-        try:
-             yaml.safe_load(fixed_text)
+        if _yaml_parses(fixed_text):
              return fixed_text
-        except:
+        else:
              # Last resort: Try to find the first valid YAML-like block
              # Check for common "expected ',' or ']', but got ':'" error
              # This happens when flow style list has map-like content: [ key: value ] -> needs { key: value } or [ {key: value} ]
@@ -193,42 +289,40 @@ def super_clean(text, format_type="python"):
              # Attempt to convert flow lists with colons to flow maps if they look like maps
              # Regex to find [ ... : ... ]
              # This is a naive heuristic
-             fixed_text = re.sub(r'\[(.*?:.*?)\]', r'[{\1}]', fixed_text)
+             if len(fixed_text) <= FLOW_MAP_FIX_MAX_CHARS:
+                 fixed_text = _FLOW_LIST_MAP_RE.sub(r'[{\1}]', fixed_text)
              
              return fixed_text # Return best effort
 
-    lines = text.split('\n')
-    cleaned = []
-    junk_prefixes = (
-        "here is", "sure", "note:", "this script", "i have",
-        "however", "please", "the following", "i've added", "corrected version",
-        "na podstawie", "w oparciu", "poniżej"
-    )
-    for line in lines:
-        stripped = line.lower().strip()
-        if any(stripped.startswith(p) for p in junk_prefixes) and not line.strip().startswith("#"):
-            continue
-        cleaned.append(line)
-    return '\n'.join(cleaned).strip()
+    # A junk-prefixed line can never be a "#" comment, so the prefix match alone decides
+    return '\n'.join(line for line in text.split('\n') if not _JUNK_LINE_RE.match(line)).strip()
+
+# HTML/Jinja markers that shouldn't be in Python, at the start of a line ([^\S\n] = whitespace within the line)
+_TEMPLATE_JUNK_LINE_RE = re.compile(r'^[^\S\n]*(?:\{%|\{\{|</|<!DOCTYPE|html[^\S\n]*$)', re.MULTILINE)
 
 def repair_python_code(code):
     """
     Attempts to repair Python code by removing trailing HTML/Jinja2 artifacts.
     """
-    lines = code.split('\n')
-    new_lines = []
-    for line in lines:
-        # Check for HTML/Jinja markers that shouldn't be in Python
-        stripped = line.strip()
-        # Heuristic: If line starts with template tags and isn't inside a python string (hard to know, but assuming garbage at end)
-        if stripped.startswith("{%") or stripped.startswith("{{") or stripped.startswith("</") or stripped.startswith("<!DOCTYPE") or stripped == "html":
-            # Likely start of template junk
-            break
-        new_lines.append(line)
-    
-    return '\n'.join(new_lines)
+    # Heuristic: the first line starting with template tags (or a bare "html") begins trailing
+    # template junk, since it's unlikely to be inside a python string. One scan, no line split.
+    match = _TEMPLATE_JUNK_LINE_RE.search(code)
+    if not match:
+        return code
+    return code[:max(match.start() - 1, 0)] # Drop the junk and the newline before it
+
+STREAM_DOTS_EVERY = 16 # Streamed chunks per progress dot
+
+def _collect_stream(stream):
+    """Joins a streamed chat response once at the end, printing a progress dot every few chunks."""
+    parts = []
+    for i, chunk in enumerate(stream, 1):
+        parts.append(chunk['message']['content'])
+        if i % STREAM_DOTS_EVERY == 0:
+            print(".", end='', flush=True)
+    return "".join(parts)
 
-def ask_agent(role, system, message, format_type="python", blackboard=None, agent_name=None, module_name=None, project_dir=None, raw_output=False):
+def ask_agent(role, system, message, format_type="python", blackboard=None, agent_name=None, module_name=None, project_dir=None, raw_output=False, no_cache=False):
     if blackboard and not project_dir:
         project_dir = blackboard.root_dir
 
@@ -247,17 +341,22 @@ def ask_agent(role, system, message, format_type="python", blackboard=None, agen
     print(f"[{role}] 🧠 Thinking...", end='', flush=True)
     full_response = ""
     try:
-        stream = ollama.chat(model=MODEL, messages=[
-            {'role': 'system', 'content': system},
-            {'role': 'user', 'content': message}
-        ], stream=True)
-        
-        for chunk in stream:
-            content = chunk['message']['content']
-            full_response += content
-            print(".", end='', flush=True)
-            
-        print(" Done!")
+        cache_key = None if no_cache else _cache_key(role, system, message)
+        cached = _cache_get(cache_key) if cache_key else None
+        if cached is not None:
+            full_response = cached
+            print(" ♻️ Cached!")
+        else:
+            with _llm_slots:
+                stream = _client.chat(model=MODEL, messages=[
+                    {'role': 'system', 'content': system},
+                    {'role': 'user', 'content': message}
+                ], stream=True, keep_alive=MODEL_KEEP_ALIVE)
+                full_response = _collect_stream(stream)
+                
+            print(" Done!")
+            if cache_key and full_response:
+                _cache_put(cache_key, full_response)
         
         # Log detailed output for debugging
         if project_dir:
@@ -303,12 +402,10 @@ def ask_agent(role, system, message, format_type="python", blackboard=None, agen
         return ""
 
 def extract_corrected_blueprint(text):
-    # Try to find explicit header
-    if any(k in text.lower() for k in ["corrected blueprint", "corrected version", "fixed blueprint", "improved blueprint"]):
-        match = re.search(r'(?:Corrected blueprint|corrected version|CORRECTED BLUEPRINT|FIXED BLUEPRINT|IMPROVED BLUEPRINT)[:\s]+', text, re.IGNORECASE)
-        if match:
-            remaining_text = text[match.end():]
-            return super_clean(remaining_text, format_type="yaml")
+    # Try to find explicit header (the regex is case-insensitive; no lowered copy of the text needed)
+    match = _BLUEPRINT_HEADER_RE.search(text)
+    if match:
+        return super_clean(text[match.end():], format_type="yaml")
     
     # Fallback: If no header, but we find a large YAML block that looks like a blueprint
     if "modules:" in text:
@@ -318,6 +415,23 @@ def extract_corrected_blueprint(text):
             
     return None
 
+# Audit line classification in one case-insensitive match. Alternatives are tried in order at
+# the start of the line, so the first category whose keywords all occur anywhere in it wins.
+_AUDIT_ISSUE_RE = re.compile(
+    r"(?P<circular>(?=.*circular)(?=.*dependency))"
+    r"|(?P<resp>(?=.*missing)(?=.*responsibility))"
+    r"|(?P<field>(?=.*missing)(?=.*field))"
+    r"|(?P<coupling>(?=.*tight coupling))"
+    r"|(?P<dup>(?=.*(?:duplication|duplicate|overlapping))(?=.*responsibility))"
+    r"|(?P<unclear>(?=.*unclear))",
+    re.IGNORECASE
+)
+_AUDIT_ISSUE_FIXED = {
+    "coupling": "COUPLING: Reduce dependencies between modules for loose coupling",
+    "dup": "DESIGN: Consolidate modules with overlapping responsibilities",
+    "unclear": "CLARITY: Make module responsibilities clearer and more specific",
+}
+
 def extract_audit_issues(audit_text):
     # Remove reasoning block first to avoid false positives
     audit_text = clean_reasoning(audit_text)
@@ -343,19 +457,17 @@ def extract_audit_issues(audit_text):
         if clean_line:
             raw_feedback.append(clean_line)
         
-        line_lower = line.lower()
-        if 'circular' in line_lower and 'dependency' in line_lower:
-            issues.append(f"ARCHITECTURE: Remove circular dependencies - {line[:120]}")
-        elif 'missing' in line_lower and 'responsibility' in line_lower:
-            issues.append(f"COMPLETENESS: Add clear responsibility description to all modules - {line[:80]}")
-        elif 'missing' in line_lower and 'field' in line_lower:
-            issues.append(f"STRUCTURE: {line}")
-        elif 'tight coupling' in line_lower:
-            issues.append(f"COUPLING: Reduce dependencies between modules for loose coupling")
-        elif ('duplication' in line_lower or 'duplicate' in line_lower or 'overlapping' in line_lower) and 'responsibility' in line_lower:
-            issues.append(f"DESIGN: Consolidate modules with overlapping responsibilities")
-        elif 'unclear' in line_lower:
-            issues.append(f"CLARITY: Make module responsibilities clearer and more specific")
+        match = _AUDIT_ISSUE_RE.match(line)
+        if match:
+            kind = match.lastgroup
+            if kind == "circular":
+                issues.append(f"ARCHITECTURE: Remove circular dependencies - {line[:120]}")
+            elif kind == "resp":
+                issues.append(f"COMPLETENESS: Add clear responsibility description to all modules - {line[:80]}")
+            elif kind == "field":
+                issues.append(f"STRUCTURE: {line}")
+            else:
+                issues.append(_AUDIT_ISSUE_FIXED[kind])
     
     # If no structured issues found, fallback to raw lines but filter intelligently
     if not issues and raw_feedback:
@@ -384,12 +496,9 @@ def chat_with_agent(agent_name, messages, project_dir=None):
     print(f"[{agent_name}] 🧠 Thinking...", end='', flush=True)
     full_response = ""
     try:
-        stream = ollama.chat(model=MODEL, messages=messages, stream=True)
-        
-        for chunk in stream:
-            content = chunk['message']['content']
-            full_response += content
-            print(".", end='', flush=True)
+        with _llm_slots:
+            stream = _client.chat(model=MODEL, messages=messages, stream=True, keep_alive=MODEL_KEEP_ALIVE)
+            full_response = _collect_stream(stream)
             
         print(" Done!")
         
@@ -1,7 +1,100 @@
 import sys
 import os
+import re
 import json
 import time
+import atexit
+import functools
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Shared JSON codec for everything under .factory/ (bytes in, bytes out)
+def json_dumps(obj, pretty=False):
+    """Encodes obj to UTF-8 JSON bytes (orjson when installed); pretty indents by 2."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if pretty else 0))
+    if pretty:
+        return json.dumps(obj, indent=2).encode("utf-8")
+    return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+json_loads = orjson.loads if ORJSON_AVAILABLE else json.loads
+
+_ts_cache = (None, "") # (epoch second, formatted timestamp)
+
+def now_str():
+    """Current '%Y-%m-%d %H:%M:%S' timestamp, formatted at most once per second."""
+    global _ts_cache
+    t = int(time.time())
+    cache = _ts_cache
+    if cache[0] != t:
+        cache = _ts_cache = (t, time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(t)))
+    return cache[1]
+
+# Directories already created by this process. os.makedirs(exist_ok=True) still
+# stats the path on every call, so repeat requests are answered from memory.
+_ensured_dirs = set()
+
+def ensure_dir(path):
+    """Creates a directory (and parents) once per process."""
+    if path and path not in _ensured_dirs:
+        os.makedirs(path, exist_ok=True)
+        _ensured_dirs.add(path)
+
+class _LogBuffer:
+    """
+    Keeps one buffered append handle per log file instead of an open/write/close per entry.
+    Flushed at phase boundaries (PHASE_END events), on error events and at exit; appends
+    that must survive a crash pass flush=True.
+    """
+    BUFFER_SIZE = 1 << 16
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.files = {} # path -> open append handle
+
+    def append(self, path, data, flush=False):
+        """Appends bytes (or text, encoded as UTF-8) to path; flush=True pushes it to the OS right away."""
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        with self.lock:
+            f = self.files.get(path)
+            if f is None:
+                f = self.files[path] = open(path, "ab", buffering=self.BUFFER_SIZE)
+            f.write(data)
+            if flush:
+                f.flush()
+
+    def flush(self):
+        with self.lock:
+            for f in self.files.values():
+                f.flush()
+
+    def close(self):
+        with self.lock:
+            for f in self.files.values():
+                f.close()
+            self.files.clear()
+
+_log_buffer = _LogBuffer()
+# Orchestration events after which everything buffered so far is written out
+_FLUSH_STATUSES = frozenset({"ERROR", "FAILED"})
+_RULE = "=" * 80
+_THIN_RULE = "-" * 80
+atexit.register(_log_buffer.close)
+
+@functools.lru_cache(maxsize=64)
+def _meta_log_path(project_dir, name):
+    """Path of a .factory log; the directory is created on the first request for it."""
+    meta_dir = os.path.join(project_dir, ".factory")
+    ensure_dir(meta_dir)
+    return os.path.join(meta_dir, name)
 
 def log_orchestration_event(project_dir, agent_name, action, details="", status="INFO"):
     """
@@ -10,22 +103,19 @@ def log_orchestration_event(project_dir, agent_name, action, details="", status=
     """
     try:
         if not project_dir: return
-        meta_dir = os.path.join(project_dir, ".factory")
-        if not os.path.exists(meta_dir):
-            os.makedirs(meta_dir, exist_ok=True)
-            
-        log_path = os.path.join(meta_dir, "orchestration_log.jsonl")
+        log_path = _meta_log_path(project_dir, "orchestration_log.jsonl")
         
         event = {
-            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "timestamp": now_str(),
             "agent": agent_name,
             "action": action,
             "status": status,
             "details": details
         }
         
-        with open(log_path, "a", encoding="utf-8") as f:
-            f.write(json.dumps(event) + "\n")
+        _log_buffer.append(log_path, json_dumps(event) + b"\n")
+        if action == "PHASE_END" or status in _FLUSH_STATUSES:
+            _log_buffer.flush()
             
     except Exception as e:
         print(f"⚠️ Failed to log orchestration event: {e}")
@@ -37,21 +127,16 @@ def log_quality_remark(project_dir, category, remark, context=""):
     """
     try:
         if not project_dir: return
-        meta_dir = os.path.join(project_dir, ".factory")
-        if not os.path.exists(meta_dir):
-            os.makedirs(meta_dir, exist_ok=True)
-            
-        log_path = os.path.join(meta_dir, "quality_remarks.jsonl")
+        log_path = _meta_log_path(project_dir, "quality_remarks.jsonl")
         
         entry = {
-            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "timestamp": now_str(),
             "category": category,
             "remark": remark,
             "context": context
         }
         
-        with open(log_path, "a", encoding="utf-8") as f:
-            f.write(json.dumps(entry) + "\n")
+        _log_buffer.append(log_path, json_dumps(entry) + b"\n")
             
     except Exception as e:
         print(f"⚠️ Failed to log quality remark: {e}")
@@ -60,58 +145,62 @@ def log_debug_interaction(project_dir, step, content):
     """Logs interaction to a readable text file for debugging."""
     try:
         meta_dir = os.path.join(project_dir, ".factory")
-        target_dir = meta_dir if os.path.exists(meta_dir) else project_dir
+        target_dir = meta_dir if meta_dir in _ensured_dirs or os.path.exists(meta_dir) else project_dir
         
         log_path = os.path.join(target_dir, "interaction_debug.txt")
-        timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
-        with open(log_path, "a", encoding="utf-8") as f:
-            f.write(f"\n{'='*80}\n")
-            f.write(f"[{timestamp}] {step}\n")
-            f.write(f"{'-'*80}\n")
-            f.write(f"{content}\n")
-            f.write(f"{'='*80}\n")
+        timestamp = now_str()
+        # One write per interaction on the shared handle, flushed so the log is complete up to a crash/hang
+        _log_buffer.append(log_path, f"\n{_RULE}\n[{timestamp}] {step}\n{_THIN_RULE}\n{content}\n{_RULE}\n", flush=True)
     except Exception as e:
         print(f"⚠️ Failed to write to interaction log: {e}")
 
+SNAPSHOT_COPY_WORKERS = 8
+
+def _copy_file(src, dest):
+    """Byte copy (zero-copy sendfile via shutil on Linux), creating the destination directory as needed."""
+    ensure_dir(os.path.dirname(dest))
+    shutil.copyfile(src, dest) # Content only: snapshots don't need mode bits or timestamps
+
+def _copy_file_quietly(pair):
+    try:
+        _copy_file(*pair)
+    except OSError:
+        pass
+
 def capture_snapshot(project_dir, attempt_num, filename=None):
     """Captures a snapshot of the project files or a specific file for debugging."""
     try:
         snapshot_dir = os.path.join(project_dir, ".factory", "debug_snapshots", f"attempt_{attempt_num}")
-        os.makedirs(snapshot_dir, exist_ok=True)
+        ensure_dir(snapshot_dir)
         
         if filename:
             # Snapshot specific file
             src = os.path.join(project_dir, filename)
             if os.path.exists(src):
-                dest = os.path.join(snapshot_dir, filename)
-                os.makedirs(os.path.dirname(dest), exist_ok=True)
                 try:
-                    with open(src, 'r', encoding='utf-8') as f:
-                        content = f.read()
-                    with open(dest, 'w', encoding='utf-8') as f:
-                        f.write(content)
+                    _copy_file(src, os.path.join(snapshot_dir, filename))
                 except Exception as e:
                     print(f"⚠️ Failed to snapshot {filename}: {e}")
         else:
             # Snapshot all .py files if no specific file identified
-            for root, _, files in os.walk(project_dir):
-                if ".factory" in root: continue
+            pairs = []
+            for root, dirs, files in os.walk(project_dir):
+                dirs[:] = [d for d in dirs if d != ".factory"] # Prune metadata (incl. older snapshots)
                 for file in files:
                     if file.endswith(".py"):
                         src = os.path.join(root, file)
-                        rel_path = os.path.relpath(src, project_dir)
-                        dest = os.path.join(snapshot_dir, rel_path)
-                        os.makedirs(os.path.dirname(dest), exist_ok=True)
-                        try:
-                            with open(src, 'r', encoding='utf-8') as f:
-                                content = f.read()
-                            with open(dest, 'w', encoding='utf-8') as f:
-                                f.write(content)
-                        except:
-                            pass
+                        pairs.append((src, os.path.join(snapshot_dir, os.path.relpath(src, project_dir))))
+            # Copies are I/O-bound; overlap them
+            with ThreadPoolExecutor(max_workers=SNAPSHOT_COPY_WORKERS) as ex:
+                for _ in ex.map(_copy_file_quietly, pairs):
+                    pass
     except Exception as e:
         print(f"⚠️ Snapshot failed completely: {e}")
 
+# Console lines worth a quality remark, minus retry chatter (case-insensitive, no lower() copy)
+_CONSOLE_ERROR_RE = re.compile(r"error|exception|failed|traceback", re.IGNORECASE)
+_CONSOLE_SKIP_RE = re.compile(r"attempt|retrying", re.IGNORECASE)
+
 class DualLogger:
     """
     Duplicates stdout to a file and the console.
@@ -122,22 +211,30 @@ class DualLogger:
         self.terminal = sys.stdout
         self.log = open(filepath, "w", encoding="utf-8")
         self.project_dir = project_dir
+        # Unterminated tail of the current console line, per thread: module workers print
+        # concurrently (and in pieces), so a shared tail would glue their lines together
+        self._tls = threading.local()
 
     def write(self, message):
         self.terminal.write(message)
         self.log.write(message)
         self.log.flush()
         
-        # Capture errors to quality remarks
-        if self.project_dir and message.strip():
-             lower_msg = message.lower()
-             if "error" in lower_msg or "exception" in lower_msg or "failed" in lower_msg or "traceback" in lower_msg:
-                 # Avoid duplicates and simple warnings
-                 if "attempt" not in lower_msg and "retrying" not in lower_msg:
-                     try:
-                        log_quality_remark(self.project_dir, "CONSOLE_ERROR", message.strip())
-                     except:
-                        pass
+        # Capture errors to quality remarks, scanning each completed line once
+        if self.project_dir is None:
+            return
+        tail = getattr(self._tls, "line_buf", "")
+        if "\n" not in message:
+            self._tls.line_buf = tail + message
+            return
+        *lines, self._tls.line_buf = (tail + message).split("\n")
+        for line in lines:
+            # Avoid duplicates and simple warnings
+            if _CONSOLE_ERROR_RE.search(line) and not _CONSOLE_SKIP_RE.search(line):
+                try:
+                    log_quality_remark(self.project_dir, "CONSOLE_ERROR", line.strip())
+                except:
+                    pass
 
     def flush(self):
         self.terminal.flush()
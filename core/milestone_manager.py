@@ -1,13 +1,20 @@
 import os
 import sys
-import json
 import yaml
-from core.logger import log_quality_remark, log_orchestration_event
+from core.logger import log_quality_remark, log_orchestration_event, ensure_dir, json_dumps, json_loads
 
 STATUS_PASSED = "PASSED"
 STATUS_FAILED = "FAILED"
 STATUS_WARNING = "WARNING"
 
+def _file_names(directory):
+    """Names of the regular files directly inside directory (empty set if it doesn't exist)."""
+    try:
+        with os.scandir(directory) as it:
+            return {e.name for e in it if e.is_file()}
+    except OSError:
+        return set()
+
 class MilestoneManager:
     def __init__(self, project_dir):
         self.project_dir = project_dir
@@ -15,18 +22,18 @@ class MilestoneManager:
         self.history = self._load_history()
 
     def _load_history(self):
-        if os.path.exists(self.milestone_log):
-            try:
-                with open(self.milestone_log, 'r') as f:
-                    return json.load(f)
-            except:
-                return []
-        return []
+        try:
+            with open(self.milestone_log, 'rb') as f:
+                data = f.read()
+            return json_loads(data)
+        except (OSError, ValueError): # Missing or corrupt log
+            return []
 
     def _save_history(self):
-        os.makedirs(os.path.dirname(self.milestone_log), exist_ok=True)
-        with open(self.milestone_log, 'w') as f:
-            json.dump(self.history, f, indent=2)
+        ensure_dir(os.path.dirname(self.milestone_log))
+        data = json_dumps(self.history, pretty=True)
+        with open(self.milestone_log, 'wb') as f:
+            f.write(data)
 
     def record_milestone(self, stage_name, status, details=None):
         entry = {
@@ -102,21 +109,20 @@ class MilestoneManager:
         passed_tests = 0
         failed_tests = 0
         
-        test_failures_dir = os.path.join(self.project_dir, ".factory", "test_failures")
+        # One directory read instead of a stat per module
+        existing_files = _file_names(self.project_dir)
         
         for m_name, result in modules_results.items():
             filename = result.get('filename')
-            file_path = os.path.join(self.project_dir, filename)
             
-            # Check Code
-            if os.path.exists(file_path):
-                # Check Tests
-                fail_log = os.path.join(test_failures_dir, f"{m_name}_fail.txt")
-                if os.path.exists(fail_log):
+            # Check Code (nested paths are not in the top-level listing)
+            if filename in existing_files or (os.path.dirname(filename) and os.path.exists(os.path.join(self.project_dir, filename))):
+                # Check Tests (suite verdict when the deferred gatekeeper ran, else the inline TDD verdict)
+                if result.get('tests_passed') is False:
                     checks.append(f"⚠️ Module {m_name}: Tests FAILED")
                     failed_tests += 1
                 else:
-                    checks.append(f"✅ Module {m_name}: Tests Passed (or no failure log)")
+                    checks.append(f"✅ Module {m_name}: Tests Passed")
                     passed_tests += 1
             else:
                 checks.append(f"❌ Module {m_name}: Code file missing ({filename})")
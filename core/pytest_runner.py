@@ -0,0 +1,206 @@
+"""
+Warm pytest runner for the gatekeeper.
+
+A single helper process ("zygote") imports pytest once and forks a child per test run,
+so each run skips interpreter start-up and the pytest import graph.
+POSIX only (needs os.fork); callers fall back to a plain subprocess when run() returns None.
+"""
+import os
+import sys
+import json
+import time
+import signal
+import atexit
+import tempfile
+import threading
+import subprocess
+import importlib.util
+
+WARM_PYTEST_AVAILABLE = hasattr(os, "fork") and importlib.util.find_spec("pytest") is not None
+
+# Directory holding the core/utils/agents packages (zygote cwd, hidden from test runs)
+_FACTORY_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Only the end of a pytest log is ever shown or fed back to the LLM
+OUTPUT_TAIL_LINES = 200
+_TAIL_BYTES = 64 * 1024
+
+# Exit code reported when the child could not even start pytest (pytest's INTERNAL_ERROR)
+_INTERNAL_ERROR = 3
+
+# ---------- ZYGOTE (helper process side) ----------
+
+def _run_child(job):
+    """Forked child: redirect output to the job log, isolate from the factory, run pytest. Never returns."""
+    rc = _INTERNAL_ERROR
+    try:
+        fd = os.open(job["log"], os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        os.dup2(fd, 1)
+        os.dup2(fd, 2)
+        os.close(fd)
+        null_fd = os.open(os.devnull, os.O_RDONLY)
+        os.dup2(null_fd, 0)
+        os.close(null_fd)
+
+        # Generated projects may have their own core.py; drop the factory's package
+        for name in [m for m in sys.modules if m.split(".")[0] == "core"]:
+            del sys.modules[name]
+        os.chdir(job["workdir"])
+        env = job["env"]
+        os.environ.clear()
+        os.environ.update(env)
+        extra_paths = [p for p in env.get("PYTHONPATH", "").split(os.pathsep) if p]
+        sys.path[:] = [job["workdir"], *extra_paths] + [p for p in sys.path if p not in ("", _FACTORY_ROOT)]
+
+        import pytest
+        rc = int(pytest.main(job["args"]))
+    except BaseException:
+        import traceback
+        traceback.print_exc()
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os._exit(rc)
+
+def _reply(job_id, rc):
+    os.write(1, (json.dumps({"id": job_id, "rc": rc}) + "\n").encode("utf-8"))
+
+def _serve():
+    """Zygote loop: one forked pytest run per JSON request line on stdin, replies on stdout."""
+    import selectors
+    import pytest  # noqa: F401 (warm import inherited by every fork)
+
+    sel = selectors.DefaultSelector()
+    sel.register(0, selectors.EVENT_READ)
+    running = {}  # pid -> (job id, deadline)
+    buf = b""
+    eof = False
+    while not eof or running:
+        if eof:
+            time.sleep(0.02)
+        else:
+            for _ in sel.select(timeout=0.02):
+                chunk = os.read(0, 65536)
+                if not chunk:
+                    eof = True
+                    sel.unregister(0)
+                buf += chunk
+            while b"\n" in buf:
+                line, buf = buf.split(b"\n", 1)
+                job = json.loads(line)
+                pid = os.fork()
+                if pid == 0:
+                    _run_child(job)
+                running[pid] = (job["id"], time.monotonic() + job["timeout"])
+
+        for pid, (job_id, deadline) in list(running.items()):
+            done, status = os.waitpid(pid, os.WNOHANG)
+            if done:
+                del running[pid]
+                _reply(job_id, os.waitstatus_to_exitcode(status))
+            elif time.monotonic() > deadline:
+                os.kill(pid, signal.SIGKILL)
+                os.waitpid(pid, 0)
+                del running[pid]
+                _reply(job_id, None)
+
+# ---------- CLIENT (factory side) ----------
+
+def _read_tail(path):
+    """Returns the last OUTPUT_TAIL_LINES lines of a log without loading the whole file."""
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        f.seek(max(0, f.tell() - _TAIL_BYTES))
+        data = f.read()
+    return "\n".join(data.decode("utf-8", errors="replace").splitlines()[-OUTPUT_TAIL_LINES:])
+
+class _WarmRunner:
+    def __init__(self):
+        self.proc = subprocess.Popen(
+            [sys.executable, "-m", "core.pytest_runner"],
+            cwd=_FACTORY_ROOT,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL
+        )
+        self.lock = threading.Lock()
+        self.pending = {}  # job id -> [threading.Event, rc]
+        self.next_id = 0
+        self.alive = True
+        threading.Thread(target=self._read_replies, daemon=True).start()
+
+    def _read_replies(self):
+        for line in self.proc.stdout:
+            reply = json.loads(line)
+            with self.lock:
+                slot = self.pending.pop(reply["id"], None)
+            if slot:
+                slot[1] = reply["rc"]
+                slot[0].set()
+        # Zygote gone: release every waiter so it can fall back
+        with self.lock:
+            self.alive = False
+            slots, self.pending = list(self.pending.values()), {}
+        for slot in slots:
+            slot[1] = "dead"
+            slot[0].set()
+
+    def run(self, workdir, args, env, timeout, log_path=None):
+        keep_log = log_path is not None
+        if not keep_log:
+            fd, log_path = tempfile.mkstemp(suffix=".pytest.log")
+            os.close(fd)
+        slot = [threading.Event(), "dead"]
+        job = {"workdir": os.path.abspath(workdir), "args": list(args), "env": dict(env), "log": log_path, "timeout": timeout}
+        try:
+            with self.lock:
+                if not self.alive:
+                    return None
+                job["id"] = self.next_id
+                self.next_id += 1
+                self.pending[job["id"]] = slot
+                self.proc.stdin.write((json.dumps(job) + "\n").encode("utf-8"))
+                self.proc.stdin.flush()
+            # The zygote enforces the deadline itself; the margin only guards against it hanging
+            if not slot[0].wait(timeout + 5) or slot[1] == "dead":
+                return None
+            output = _read_tail(log_path)
+        except OSError:
+            return None
+        finally:
+            if not keep_log and os.path.exists(log_path):
+                os.remove(log_path)
+        if slot[1] is None:
+            raise subprocess.TimeoutExpired(["pytest", *args], timeout, output=output)
+        return slot[1], output
+
+    def close(self):
+        try:
+            self.proc.stdin.close()
+        except OSError:
+            pass
+
+_runner = None
+_runner_lock = threading.Lock()
+
+def run(workdir, args, env, timeout, log_path=None):
+    """
+    Runs pytest with args inside workdir on the warm zygote.
+    The full output goes to log_path (a temp file if None); only its tail is returned.
+    Returns (returncode, output tail), None if the warm runner is unavailable,
+    and raises subprocess.TimeoutExpired like subprocess.run.
+    """
+    global _runner
+    if not WARM_PYTEST_AVAILABLE:
+        return None
+    with _runner_lock:
+        if _runner is None:
+            try:
+                _runner = _WarmRunner()
+            except OSError:
+                return None
+            atexit.register(_runner.close)
+    return _runner.run(workdir, args, env, timeout, log_path)
+
+if __name__ == "__main__":
+    _serve()
@@ -1,5 +1,5 @@
 import os
-import json
+from core.logger import json_loads
 
 def load_quality_standards():
     """Load quality standards from JSON files."""
@@ -9,10 +9,13 @@ def load_quality_standards():
     
     try:
         for filename in ["python_standards.json", "sql_standards.json", "web_standards.json"]:
-            path = os.path.join(standards_dir, filename)
-            if os.path.exists(path):
-                with open(path, "r", encoding="utf-8") as f:
-                    standards[filename.replace("_standards.json", "")] = json.load(f)
+            # Open directly (a missing file is skipped) and parse the raw bytes
+            try:
+                with open(os.path.join(standards_dir, filename), "rb") as f:
+                    data = f.read()
+            except FileNotFoundError:
+                continue
+            standards[filename.replace("_standards.json", "")] = json_loads(data)
     except Exception as e:
         print(f"⚠️ Failed to load quality standards: {e}")
         
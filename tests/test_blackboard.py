@@ -0,0 +1,48 @@
+"""Round-trip tests for the blackboard's append-only JSONL sidecars."""
+from core.factory_boss_blackboard import FactoryBlackboard, FactoryMetrics
+
+
+def test_logs_sidecar_keeps_full_history(tmp_path):
+    bb = FactoryBlackboard("idea", str(tmp_path))
+    count = bb.LOG_TAIL + 5
+    for i in range(count):
+        bb.log(f"msg {i}")
+    bb.flush()
+
+    assert [e["msg"] for e in bb.logs_log] == [f"msg {i}" for i in range(count)]
+    assert bb.state["logs"] == [f"msg {i}" for i in range(5, count)]
+
+
+def test_agent_attempts_round_trip(tmp_path):
+    metrics = FactoryMetrics(str(tmp_path))
+    metrics.log_agent_attempt("L4_DEVELOPER", "calc", 1, "short prompt", "code", "SUCCESS")
+    metrics.log_agent_attempt("L4_DEVELOPER", "calc", 2, "short prompt", "code v2", "FAILED", error="boom")
+    metrics.flush()
+
+    attempts = FactoryMetrics(str(tmp_path)).get_agent_attempts()
+    assert [(a["attempt_number"], a["input"], a["output"], a["status"], a["error"]) for a in attempts] == [
+        (1, "short prompt", "code", "SUCCESS", None),
+        (2, "short prompt", "code v2", "FAILED", "boom"),
+    ]
+
+
+def test_repeated_prompt_is_logged_once_and_resolved(tmp_path):
+    prompt = "CONTEXT:\n" + "x" * 500
+    metrics = FactoryMetrics(str(tmp_path))
+    for attempt in (1, 2, 3):
+        metrics.log_agent_attempt("L4_DEVELOPER", "calc", attempt, prompt, f"code {attempt}", "FAILED")
+    metrics.flush()
+
+    raw = list(metrics.attempts_log)
+    assert "input_id" in raw[0] and raw[0]["input"] == prompt
+    assert all("input" not in e and e["input_ref"] == raw[0]["input_id"] for e in raw[1:])
+
+    # A later run logs the text again under its own first attempt; refs resolve across both runs
+    rerun = FactoryMetrics(str(tmp_path))
+    rerun.log_agent_attempt("L4_DEVELOPER", "calc", 1, prompt, "code", "SUCCESS")
+    rerun.log_agent_attempt("L4_DEVELOPER", "calc", 2, prompt, "code", "SUCCESS")
+    rerun.flush()
+    attempts = rerun.get_agent_attempts()
+    assert len(attempts) == 5
+    assert all(a["input"] == prompt for a in attempts)
+    assert not any("input_id" in a or "input_ref" in a for a in attempts)
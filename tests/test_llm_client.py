@@ -0,0 +1,35 @@
+"""Tests for the LLM output cleaners in core/llm_client.py."""
+import random
+
+import pytest
+
+pytest.importorskip("ollama")
+from core.llm_client import clean_reasoning, _REASONING_RE
+
+PIECES = ["REASONING:", "reasoning:", "Reasoning:", "END REASONING", "end reasoning", "End Reasoning",
+          "REASONING", "END", ":", " ", "\n", "code", "x = 1", "ß", "ı", "İ", "Ω"]
+
+
+def _reference(text):
+    return _REASONING_RE.sub('', text)
+
+
+@pytest.mark.parametrize("text", [
+    "",
+    "no blocks here",
+    "REASONING: think\nEND REASONING\ncode",
+    "a REASONING: one END REASONING b reasoning: two end reasoning c",
+    "REASONING: never closed",
+    "REASONING:END REASONING",
+    "REASONING: x END REASONING END REASONING",
+    "Straße REASONING: ß END REASONING rest",
+])
+def test_clean_reasoning_examples(text):
+    assert clean_reasoning(text) == _reference(text)
+
+
+def test_clean_reasoning_matches_regex_on_random_input():
+    rng = random.Random(1234)
+    for _ in range(5000):
+        text = "".join(rng.choice(PIECES) for _ in range(rng.randint(0, 20)))
+        assert clean_reasoning(text) == _reference(text), text
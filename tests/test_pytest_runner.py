@@ -0,0 +1,58 @@
+"""Tests for the warm pytest zygote (core/pytest_runner.py) against a tiny temp project."""
+import os
+import time
+import subprocess
+
+import pytest
+
+from core import pytest_runner
+
+pytestmark = pytest.mark.skipif(not pytest_runner.WARM_PYTEST_AVAILABLE, reason="warm runner needs os.fork and pytest")
+
+ARGS = ("-q", "-p", "no:cacheprovider")
+
+
+@pytest.fixture
+def project(tmp_path):
+    (tmp_path / "calc.py").write_text("def add(a, b):\n    return a + b\n", encoding="utf-8")
+    (tmp_path / "test_pass.py").write_text("from calc import add\n\ndef test_add():\n    assert add(2, 3) == 5\n", encoding="utf-8")
+    (tmp_path / "test_fail.py").write_text("from calc import add\n\ndef test_add():\n    assert add(2, 2) == 5\n", encoding="utf-8")
+    (tmp_path / "test_slow.py").write_text("import time\n\ndef test_slow():\n    time.sleep(30)\n", encoding="utf-8")
+    return tmp_path
+
+
+@pytest.fixture
+def env(project):
+    return {**os.environ, "PYTHONPATH": str(project)}
+
+
+def test_passing_run(project, env):
+    rc, output = pytest_runner.run(project, [*ARGS, "test_pass.py"], env, 60)
+    assert rc == 0
+    assert "1 passed" in output
+
+
+def test_failing_run_writes_log(project, env, tmp_path_factory):
+    log_path = tmp_path_factory.mktemp("logs") / "fail.txt"
+    rc, output = pytest_runner.run(project, [*ARGS, "test_fail.py"], env, 60, log_path=str(log_path))
+    assert rc == 1
+    assert "1 failed" in output
+    assert "1 failed" in log_path.read_text(encoding="utf-8")
+
+
+def test_timeout_raises(project, env):
+    start = time.monotonic()
+    with pytest.raises(subprocess.TimeoutExpired):
+        pytest_runner.run(project, [*ARGS, "test_slow.py"], env, 1)
+    assert time.monotonic() - start < 15
+
+
+def test_killed_zygote_returns_none(project, env, monkeypatch):
+    runner = pytest_runner._WarmRunner()
+    runner.proc.kill()
+    runner.proc.wait()
+    deadline = time.monotonic() + 5
+    while runner.alive and time.monotonic() < deadline:
+        time.sleep(0.01)
+    monkeypatch.setattr(pytest_runner, "_runner", runner)
+    assert pytest_runner.run(project, [*ARGS, "test_pass.py"], env, 60) is None
@@ -2,13 +2,17 @@ import ast
 
 def analyze_code_structure(code):
     """
-    Analyzes Python code to extract defined classes, functions, and their signatures.
+    Analyzes Python code (source string or an already parsed ast.AST) to extract
+    defined classes, functions, and their signatures.
     Returns a dictionary describing the actual implementation.
     """
-    try:
-        tree = ast.parse(code)
-    except SyntaxError:
-        return {"error": "SyntaxError", "classes": [], "functions": []}
+    if isinstance(code, ast.AST):
+        tree = code
+    else:
+        try:
+            tree = ast.parse(code)
+        except SyntaxError:
+            return {"error": "SyntaxError", "classes": [], "functions": []}
 
     structure = {
         "classes": {},
@@ -78,3 +82,8 @@ def generate_implementation_summary(structure):
         summary.append("WARNING: No classes or functions detected.")
 
     return "\n".join(summary)
+
+def analyze_and_summarize(code):
+    """Structure + summary in one call (picklable result, usable from a worker process)."""
+    structure = analyze_code_structure(code)
+    return structure, generate_implementation_summary(structure)
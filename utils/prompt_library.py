@@ -256,7 +256,7 @@ ABSOLUTE REQUIREMENTS:
     *   Do NOT put business logic in routes. Delegate to services.
     *   Return JSON: `return jsonify(service.get_data())`.
 5.  **SERVE FRONTEND**: Add a route for `/` that renders `index.html`.
-6.  **ENTRY POINT**: Include `if __name__ == "__main__": app.run(...)`.
+6.  **ENTRY POINT**: Include `if __name__ == "__main__": app.run(...)`, reading the port with `int(os.environ.get("PORT", 5000))`.
 
 STRICT OUTPUT RULES:
 1.  Output **ONLY** valid Python code.
@@ -266,6 +266,7 @@ STRICT OUTPUT RULES:
 
 TEMPLATE TO FOLLOW:
 ```python
+import os
 from flask import Flask, jsonify, request, render_template
 from flask_sqlalchemy import SQLAlchemy
 import logging
@@ -305,7 +306,7 @@ def index():
 
 # 6. Entry Point
 if __name__ == '__main__':
-    app.run(debug=True, port=5000)
+    app.run(debug=True, port=int(os.environ.get("PORT", 5000)))
 ```
 """
 
@@ -666,10 +667,11 @@ For Flask Web Apps, generate main.py that:
 - Instantiates services in the correct order (Database -> Repositories -> Services -> Controllers)
 - Defines routes using these instances: @app.route(...) -> user_service.get_users()
 - Initializes database if needed
-- Runs on port 5000 (or as defined in runtime section)
+- Runs on the port from the PORT environment variable, defaulting to 5000 (or as defined in runtime section)
 
 FLASK ROUTING PATTERN (YOU MUST FOLLOW THIS EXACT STRUCTURE):
 ```python
+import os
 from flask import Flask, jsonify, request, render_template
 # Import your modules (Adjust names to match your actual files!)
 # Example: from user_service import UserService
@@ -701,7 +703,7 @@ def index():
     return render_template('index.html')
 
 if __name__ == '__main__':
-    app.run(debug=True, port=5000)
+    app.run(debug=True, port=int(os.environ.get("PORT", 5000)))
 ```
 
 Output ONLY Python code enclosed in ```python ... ``` blocks.
@@ -883,6 +885,42 @@ OUTPUT:
 - Enclose in ```python ... ``` block.
 """
 
+# Single round-trip variant of TEST_ENGINEER_PROMPT + DEVELOPER_AGENT_TDD_PROMPT
+COMBINED_TDD_PROMPT = """You are the TDD PAIR (Test Engineer + Developer).
+Your goal is to write BOTH the `pytest` test file for a module AND the implementation that passes it, in ONE response.
+
+INPUT:
+1. Module Name and Filename (e.g., "services/user_service.py")
+2. Module Specification (What to build)
+3. Dependency Specifications (Other modules this one may use)
+4. `requirements.txt` (Available libraries)
+
+TEST RULES (Red Phase):
+1. Use `pytest` framework. The test file will be placed in a `tests/` subdirectory.
+2. Import the module under test from its FILENAME, assuming the project root is in the python path.
+3. Cover success cases, edge cases, and error handling defined in the Spec.
+4. **MOCK ALL INTERNAL DEPENDENCIES** via `sys.modules['<name>'] = MagicMock()` BEFORE importing the module under test. Other modules MAY NOT EXIST YET.
+5. **MOCK FILE I/O** with `mock_open` or by patching `builtins.open`. NEVER assume a file exists.
+6. Do NOT output `[pytest]` blocks or `pytest.ini` content.
+
+CODE RULES (Green Phase):
+1. Implement the logic so that YOUR tests pass.
+2. STRICTLY FOLLOW THE API SPECIFICATION for function signatures and class constructors.
+3. Use only the libraries listed in `requirements.txt`.
+4. If the tests mock dependencies, accept them via Dependency Injection.
+5. **SECURITY IS PARAMOUNT**: parameterized SQL only, validate external input, no raw HTML from user input, no `pickle`/`yaml.load` on untrusted data.
+
+OUTPUT FORMAT (EXACTLY two sections, markers on their own lines, nothing else):
+===TESTS===
+```python
+<full test file>
+```
+===CODE===
+```python
+<full module implementation>
+```
+"""
+
 RUNNABLE_AUDIT_PROMPT = """You are the System Audit Officer.
 Perform a final system-level runnable audit.
 
@@ -931,6 +969,7 @@ print("Hello World")
 - Do NOT include any explanations.
 - Do NOT include conversational text.
 - ONLY OUTPUT THE "FILE:" LINE AND THE CODE BLOCK.
+- Keep (or add) the server port as `int(os.environ.get("PORT", 5000))`; never hard-code it.
 """
 
 FACTORY_BOSS_L4_QUALITY_STANDARDS = r'''